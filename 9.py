@@ -37,43 +37,102 @@ class UserUpdate(BaseModel):
     following: Optional[List[int]] = None
     location: Optional[Location] = None
 
+# Build the User response shape from an ES hit as a plain dict (documents are validated when written).
+# List routes return these in an ORJSONResponse with response_model=None, so Pydantic never re-validates
+# them at serialization time; the User schema is still documented through responses=
+def user_from_hit(hit: dict) -> dict:
+    source = hit["_source"]
+    return {
+        "id": int(hit["_id"]),
+        "name": source["name"],
+        "gender": source["gender"],
+        "status": source["status"],
+        "following": source.get("following", []),
+        "location": source["location"]
+    }
+
 ---
 // db.py
-from elasticsearch import Elasticsearch
+import os
+import orjson
+from cachetools import TTLCache
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.serializer import JSONSerializer
 from fastapi import HTTPException
 
-# Initialize Elasticsearch client
-try:
-    es = Elasticsearch(hosts=["http://localhost:9200"])
-    # Verify connection
-    if not es.ping():
-        raise HTTPException(status_code=500, detail="Failed to connect to Elasticsearch at http://localhost:9200")
-except Exception as e:
-    raise HTTPException(status_code=500, detail=f"Elasticsearch initialization failed: {str(e)}")
+# Serialize request/response bodies with orjson instead of the stdlib json module
+class ORJSONSerializer(JSONSerializer):
+    def dumps(self, data):
+        # Bulk bodies are passed through already serialized
+        if isinstance(data, str):
+            return data
+        return orjson.dumps(data, default=self.default).decode()
+
+    def loads(self, s):
+        return orjson.loads(s)
+
+# Initialize Elasticsearch client (one instance shared by all routes, closed on app shutdown).
+# Never create clients inside handlers: every instance owns its own connection pool.
+es = AsyncElasticsearch(
+    hosts=["http://localhost:9200"],
+    maxsize=64,  # concurrent connections kept open to the node
+    # gzip request bodies and send Accept-Encoding: gzip. Keep-alive and TCP_NODELAY are
+    # already the aiohttp transport defaults, so small requests aren't held back by Nagle.
+    http_compress=True,
+    # Overridable per environment; the test config sets tight values so error paths fail fast
+    timeout=float(os.getenv("ES_REQUEST_TIMEOUT", "10")),
+    retry_on_timeout=True,
+    max_retries=int(os.getenv("ES_MAX_RETRIES", "3")),
+    sniff_on_start=False,
+    serializer=ORJSONSerializer()
+)
 
 # Define the index name
 INDEX_NAME = "users"
 
-# Create the index if it doesn't exist with mappings
-try:
-    if not es.indices.exists(index=INDEX_NAME):
-        es.indices.create(
-            index=INDEX_NAME,
-            body={
-                "mappings": {
-                    "properties": {
-                        "name": {"type": "text"},
-                        "gender": {"type": "keyword"},
-                        "status": {"type": "keyword"},
-                        // "interested_in": {"type": "keyword"},  # Added field
-                        "following": {"type": "integer"},
-                        "location": {"type": "geo_point"}
+# Recently read user sources by id; writes to a user must pop its entry
+user_cache = TTLCache(maxsize=10000, ttl=30)
+
+# Fields returned by list endpoints, and the response paths they need (ids and sources only)
+USER_FIELDS = ["name", "gender", "status", "following", "location"]
+HITS_FILTER_PATH = ["hits.hits._id", "hits.hits._source"]
+
+# Hits of a HITS_FILTER_PATH search; filter_path drops the "hits" key entirely when nothing matched
+def hits_of(res: dict) -> list:
+    return res.get("hits", {}).get("hits", [])
+
+# Called once from the app startup event
+async def init_index():
+    # Verify connection
+    try:
+        if not await es.ping():
+            raise HTTPException(status_code=500, detail="Failed to connect to Elasticsearch at http://localhost:9200")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Elasticsearch initialization failed: {str(e)}")
+
+    # Create the index if it doesn't exist with mappings
+    try:
+        if not await es.indices.exists(index=INDEX_NAME):
+            await es.indices.create(
+                index=INDEX_NAME,
+                body={
+                    "mappings": {
+                        "properties": {
+                            # Copy of the document id as a number; list routes sort and search_after on its
+                            # doc values, since _id sorts as a string and needs fielddata
+                            "id": {"type": "long"},
+                            "name": {"type": "text"},
+                            "gender": {"type": "keyword"},
+                            "status": {"type": "keyword"},
+                            // "interested_in": {"type": "keyword"},  # Added field
+                            "following": {"type": "integer"},
+                            "location": {"type": "geo_point"}
+                        }
                     }
                 }
-            }
-        )
-except Exception as e:
-    raise HTTPException(status_code=500, detail=f"Failed to create Elasticsearch index: {str(e)}")
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create Elasticsearch index: {str(e)}")
 
 ---
 // routes/create_user.py
@@ -84,36 +143,64 @@ from ..db import es, INDEX_NAME
 router = APIRouter()
 
 @router.post(path="/users/", response_model=User)
-def create_user(user: User):
+async def create_user(user: User):
     if user.id is None:
         raise HTTPException(status_code=400, detail="User ID is required")
-    if es.exists(index=INDEX_NAME, id=str(user.id)):
+    if await es.exists(index=INDEX_NAME, id=str(user.id)):
         raise HTTPException(status_code=400, detail="User with this ID already exists")
     
-    body = user.dict(exclude={"id"})
-    body["location"] = [user.location.lon, user.location.lat]  # Store as [lon, lat] for geo_point
-    res = es.index(index=INDEX_NAME, id=str(user.id), body=body)
+    # id is kept in the source as well, so it gets the numeric mapping list routes page on
+    body = user.dict()
+    # location is stored as a {"lon", "lat"} object, which geo_point accepts and reads back as-is
+    res = await es.index(index=INDEX_NAME, id=str(user.id), body=body)
     if res["result"] != "created":
         raise HTTPException(status_code=500, detail="Failed to create user")
-    return User(id=user.id, **body)
+    return User(**body)
+
+---
+// routes/bulk_create.py
+from fastapi import APIRouter, HTTPException
+from elasticsearch.helpers import async_bulk
+from typing import List
+from ..models import User
+from ..db import es, INDEX_NAME
+
+router = APIRouter()
+
+@router.post(path="/users/bulk", response_model=dict)
+async def bulk_create_users(users: List[User]):
+    if any(user.id is None for user in users):
+        raise HTTPException(status_code=400, detail="User ID is required")
+
+    def actions():
+        for user in users:
+            body = user.dict()
+            yield {"_op_type": "create", "_index": INDEX_NAME, "_id": str(user.id), "_source": body}
+
+    try:
+        # Index in chunks of 500 docs per request; existing ids are reported back instead of failing the batch
+        created, errors = await async_bulk(es, actions(), chunk_size=500, raise_on_error=False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"created": created, "failed": [int(error["create"]["_id"]) for error in errors]}
 
 ---
 // routes/get_user.py
 from fastapi import APIRouter, HTTPException
 from elasticsearch.exceptions import NotFoundError
 from ..models import User
-from ..db import es, INDEX_NAME
+from ..db import es, INDEX_NAME, user_cache
 
 router = APIRouter()
 
 @router.get(path="/users/{id}", response_model=User)
-def get_user(id: int):
+async def get_user(id: int):
     try:
-        res = es.get(index=INDEX_NAME, id=str(id))
-        source = res["_source"]
-        if "location" in source and isinstance(source["location"], list):
-            source["location"] = {"lon": source["location"][0], "lat": source["location"][1]}
-        return User(id=id, **source)
+        source = user_cache.get(id)
+        if source is None:
+            source = (await es.get(index=INDEX_NAME, id=str(id)))["_source"]
+            user_cache[id] = source
+        return User(**dict(source, id=id))
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -124,31 +211,25 @@ def get_user(id: int):
 from fastapi import APIRouter, HTTPException
 from elasticsearch.exceptions import NotFoundError
 from ..models import User, UserUpdate
-from ..db import es, INDEX_NAME
+from ..db import es, INDEX_NAME, user_cache
 
 router = APIRouter()
 
 @router.patch(path="/users/{id}", response_model=User)
-def update_user(id: int, user_update: UserUpdate):
+async def update_user(id: int, user_update: UserUpdate):
+    # Validated before the try so the 400 isn't re-wrapped as a 500 by the catch-all below
+    update_doc = {k: v for k, v in user_update.dict().items() if v is not None}
+    if not update_doc:
+        raise HTTPException(status_code=400, detail="No fields provided for update")
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        update_doc = {k: v for k, v in user_update.dict().items() if v is not None}
-        if "location" in update_doc:
-            update_doc["location"] = [update_doc["location"].lon, update_doc["location"].lat]
-        if not update_doc:
-            raise HTTPException(status_code=400, detail="No fields provided for update")
-        
-        res = es.update(index=INDEX_NAME, id=str(id), body={"doc": update_doc})
+        # A missing user raises NotFoundError; _source=True returns the updated document in the same response
+        res = await es.update(index=INDEX_NAME, id=str(id), body={"doc": update_doc}, _source=True)
+        user_cache.pop(id, None)
         if res["result"] != "updated":
             raise HTTPException(status_code=500, detail="Failed to update user")
         
-        updated_doc = es.get(index=INDEX_NAME, id=str(id))
-        source = updated_doc["_source"]
-        if "location" in source and isinstance(source["location"], list):
-            source["location"] = {"lon": source["location"][0], "lat": source["location"][1]}
-        return User(id=id, **source)
+        source = res["get"]["_source"]
+        return User(**dict(source, id=id))
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -158,17 +239,15 @@ def update_user(id: int, user_update: UserUpdate):
 // routes/delete_user.py
 from fastapi import APIRouter, HTTPException
 from elasticsearch.exceptions import NotFoundError
-from ..db import es, INDEX_NAME
+from ..db import es, INDEX_NAME, user_cache
 
 router = APIRouter()
 
 @router.delete(path="/users/{id}", status_code=204)
-def delete_user(id: int):
+async def delete_user(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        res = es.delete(index=INDEX_NAME, id=str(id))
+        res = await es.delete(index=INDEX_NAME, id=str(id))
+        user_cache.pop(id, None)
         if res["result"] != "deleted":
             raise HTTPException(status_code=500, detail="Failed to delete user")
         return None
@@ -188,42 +267,48 @@ from ..db import es, INDEX_NAME
 router = APIRouter()
 
 @router.get(path="/users/{id}/suggestions", response_model=List[User])
-def get_user_suggestions(id: int):
+async def get_user_suggestions(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        user_doc = (await es.get(index=INDEX_NAME, id=str(id)))["_source"]
         following = user_doc.get("following", [])
-        
-        suggested_ids = set()
-        for followed_id in following:
-            if es.exists(index=INDEX_NAME, id=str(followed_id)):
-                followed_doc = es.get(index=INDEX_NAME, id=str(followed_id))["_source"]
-                followed_following = followed_doc.get("following", [])
-                suggested_ids.update(followed_following)
-        
-        suggested_ids.discard(id)
-        for fid in following:
-            suggested_ids.discard(fid)
-        
+
         suggestions = []
-        for sid in suggested_ids:
-            if es.exists(index=INDEX_NAME, id=str(sid)):
-                doc = es.get(index=INDEX_NAME, id=str(sid))["_source"]
-                if "location" in doc and isinstance(doc["location"], list):
-                    doc["location"] = {"lon": doc["location"][0], "lat": doc["location"][1]}
-                suggestions.append(
-                    User(
-                        id=sid,
-                        name=doc["name"],
-                        gender=doc["gender"],
-                        status=doc["status"],
-                        // interested_in=doc.get("interested_in"),  # Handle new field
-                        following=[],
-                        location=doc["location"]
-                    )
+        if not following:
+            return suggestions
+
+        # Let ES compute friends of friends: bucket the following lists of the followed users,
+        # excluding the user and everyone already followed (most shared candidates first)
+        res = await es.search(
+            index=INDEX_NAME,
+            body={
+                "size": 0,
+                "query": {"ids": {"values": [str(f) for f in following]}},
+                "aggs": {
+                    "candidates": {
+                        "terms": {"field": "following", "size": 10000, "exclude": [id] + following}
+                    }
+                }
+            }
+        )
+        ids = [str(bucket["key"]) for bucket in res["aggregations"]["candidates"]["buckets"]]
+        if not ids:
+            return suggestions
+
+        rank = {sid: i for i, sid in enumerate(ids)}
+        res = await es.search(index=INDEX_NAME, body={"query": {"ids": {"values": ids}}}, size=len(ids))
+        for hit in sorted(res["hits"]["hits"], key=lambda hit: rank[hit["_id"]]):
+            doc = hit["_source"]
+            suggestions.append(
+                User(
+                    id=int(hit["_id"]),
+                    name=doc["name"],
+                    gender=doc["gender"],
+                    status=doc["status"],
+                    // interested_in=doc.get("interested_in"),  # Handle new field
+                    following=[],
+                    location=doc["location"]
                 )
+            )
         
         return suggestions
     except NotFoundError:
@@ -234,14 +319,15 @@ def get_user_suggestions(id: int):
 ---
 // routes/delete_all.py
 from fastapi import APIRouter, HTTPException
-from ..db import es, INDEX_NAME
+from ..db import es, INDEX_NAME, user_cache
 
 router = APIRouter()
 
 @router.delete(path="/users/", status_code=204)
-def delete_all_users():
+async def delete_all_users():
     try:
-        res = es.delete_by_query(index=INDEX_NAME, body={"query": {"match_all": {}}})
+        res = await es.delete_by_query(index=INDEX_NAME, body={"query": {"match_all": {}}})
+        user_cache.clear()
         if res["deleted"] is None:
             raise HTTPException(status_code=500, detail="Failed to delete all users")
         return None
@@ -251,14 +337,15 @@ def delete_all_users():
 ---
 // routes/get_all.py
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
-from ..models import Gender, Status, User
-from ..db import es, INDEX_NAME
+from ..models import Gender, Status, User, user_from_hit
+from ..db import es, INDEX_NAME, USER_FIELDS, HITS_FILTER_PATH, hits_of
 
 router = APIRouter()
 
-@router.get(path="/users/", response_model=List[User])
-def get_all_users(
+@router.get(path="/users/", response_model=None, responses={200: {"model": List[User]}})
+async def get_all_users(
     name: Optional[str] = Query(None),
     gender: Optional[Gender] = Query(None),
     status: Optional[Status] = Query(None),
@@ -266,8 +353,15 @@ def get_all_users(
     following: Optional[int] = Query(None),
     lon: Optional[float] = Query(None),
     lat: Optional[float] = Query(None),
-    radius: Optional[float] = Query(10.0, ge=0.1)
+    radius: Optional[float] = Query(10.0, ge=0.1),
+    size: int = Query(50, ge=1, le=1000),
+    after: Optional[int] = Query(None)
 ):
+    """
+    List users, optionally filtered by name, gender, status, followed user, and distance from lon/lat.
+    Pages are ordered numerically by the `id` doc-value field (not `_id`, which sorts as a string and
+    needs fielddata): pass the last returned user's id as `after` to get the next page.
+    """
     if (lon is not None and lat is None) or (lon is None and lat is not None):
         raise HTTPException(status_code=400, detail="Both lon and lat must be provided for location filtering")
     
@@ -292,74 +386,82 @@ def get_all_users(
     if not query["bool"]["filter"]:
         query = {"match_all": {}}
     
+    body = {"query": query, "_source": USER_FIELDS, "sort": [{"id": "asc"}]}
+    if after is not None:
+        body["search_after"] = [after]
+    
     try:
-        res = es.search(index=INDEX_NAME, body={"query": query}, size=10000)
-        users = []
-        for hit in res["hits"]["hits"]:
-            source = hit["_source"]
-            if "location" in source and isinstance(source["location"], list):
-                source["location"] = {"lon": source["location"][0], "lat": source["location"][1]}
-            users.append(User(id=int(hit["_id"]), **source))
-        return users
+        res = await es.search(index=INDEX_NAME, body=body, size=size, filter_path=HITS_FILTER_PATH)
+        return ORJSONResponse([user_from_hit(hit) for hit in hits_of(res)])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 ---
 // routes/get_followers.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import ORJSONResponse
 from elasticsearch.exceptions import NotFoundError
-from typing import List
-from ..models import User
-from ..db import es, INDEX_NAME
+from typing import List, Optional
+from ..models import User, user_from_hit
+from ..db import es, INDEX_NAME, USER_FIELDS, HITS_FILTER_PATH, hits_of
 
 router = APIRouter()
 
-@router.get(path="/users/{id}/followers", response_model=List[User])
-def get_followers(id: int):
+@router.get(path="/users/{id}/followers", response_model=None, responses={200: {"model": List[User]}})
+async def get_followers(
+    id: int,
+    size: int = Query(50, ge=1, le=1000),
+    after: Optional[int] = Query(None)
+):
+    """
+    List the users who follow the user (id); 404 if that user doesn't exist.
+    Pages are ordered numerically by the `id` doc-value field (not `_id`, which sorts as a string and
+    needs fielddata): pass the last returned follower's id as `after` to get the next page.
+    """
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
+        body = {"query": {"term": {"following": id}}, "_source": USER_FIELDS, "sort": [{"id": "asc"}]}
+        if after is not None:
+            body["search_after"] = [after]
+        res = await es.search(index=INDEX_NAME, body=body, size=size, filter_path=HITS_FILTER_PATH)
+        hits = hits_of(res)
+        # An unknown user also has no followers; only an empty page pays the exists() round trip to tell them apart
+        if not hits and not await es.exists(index=INDEX_NAME, id=str(id)):
             raise HTTPException(status_code=404, detail="User not found")
-        
-        query = {"term": {"following": id}}
-        res = es.search(index=INDEX_NAME, body={"query": query}, size=10000)
-        users = []
-        for hit in res["hits"]["hits"]:
-            source = hit["_source"]
-            if "location" in source and isinstance(source["location"], list):
-                source["location"] = {"lon": source["location"][0], "lat": source["location"][1]}
-            users.append(User(id=int(hit["_id"]), **source))
-        return users
+        return ORJSONResponse([user_from_hit(hit) for hit in hits])
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 ---
 // routes/get_following.py
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from elasticsearch.exceptions import NotFoundError
 from typing import List
-from ..models import User
-from ..db import es, INDEX_NAME
+from ..models import User, user_from_hit
+from ..db import es, INDEX_NAME, USER_FIELDS, HITS_FILTER_PATH, hits_of
 
 router = APIRouter()
 
-@router.get(path="/users/{id}/following", response_model=List[User])
-def get_following(id: int):
+@router.get(path="/users/{id}/following", response_model=None, responses={200: {"model": List[User]}})
+async def get_following(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        # Only the following list is needed from the user itself
+        user_doc = (await es.get(index=INDEX_NAME, id=str(id), _source=["following"]))["_source"]
         following = user_doc.get("following", [])
-        
-        following_users = []
-        for follow_id in following:
-            if es.exists(index=INDEX_NAME, id=str(follow_id)):
-                doc = es.get(index=INDEX_NAME, id=str(follow_id))["_source"]
-                if "location" in doc and isinstance(doc["location"], list):
-                    doc["location"] = {"lon": doc["location"][0], "lat": doc["location"][1]}
-                following_users.append(User(id=follow_id, **doc))
-        
-        return following_users
+        if not following:
+            return []
+
+        # One ids search for every followed user, trimmed to the response fields
+        ids = [str(f) for f in following]
+        res = await es.search(
+            index=INDEX_NAME,
+            body={"query": {"ids": {"values": ids}}, "_source": USER_FIELDS},
+            size=len(ids),
+            filter_path=HITS_FILTER_PATH
+        )
+        return ORJSONResponse([user_from_hit(hit) for hit in hits_of(res)])
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -370,44 +472,81 @@ def get_following(id: int):
 from fastapi import APIRouter, HTTPException
 from elasticsearch.exceptions import NotFoundError
 from typing import List
-from ..db import es, INDEX_NAME
+from ..db import es, INDEX_NAME, user_cache
 
 router = APIRouter()
 
 @router.post(path="/users/{id}/follow/{follow_id}", response_model=dict)
-def add_follow(id: int, follow_id: int):
+async def add_follow(id: int, follow_id: int):
+    if id == follow_id:
+        raise HTTPException(status_code=400, detail="Cannot follow self")
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        if not es.exists(index=INDEX_NAME, id=str(follow_id)):
+        # The user's own existence is checked by the update below (NotFoundError)
+        if follow_id not in user_cache and not await es.exists(index=INDEX_NAME, id=str(follow_id)):
             raise HTTPException(status_code=404, detail="Follow user not found")
-        if id == follow_id:
-            raise HTTPException(status_code=400, detail="Cannot follow self")
         
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
-        if follow_id not in user_doc.get("following", []):
-            user_doc["following"].append(follow_id)
-            es.update(index=INDEX_NAME, id=str(id), body={"doc": {"following": user_doc["following"]}})
+        # Append atomically on the ES side; already following is a noop (no reindex)
+        res = await es.update(
+            index=INDEX_NAME,
+            id=str(id),
+            body={
+                "script": {
+                    "lang": "painless",
+                    "source": """
+                        if (ctx._source.following == null) {
+                            ctx._source.following = [];
+                        }
+                        if (ctx._source.following.contains(params.follow_id)) {
+                            ctx.op = 'noop';
+                        } else {
+                            ctx._source.following.add(params.follow_id);
+                        }
+                    """,
+                    "params": {"follow_id": follow_id}
+                }
+            },
+            _source=True
+        )
+        user_cache.pop(id, None)
         
-        return {"id": id, "following": user_doc["following"]}
+        return {"id": id, "following": res["get"]["_source"].get("following", [])}
+    except HTTPException:
+        # "Follow user not found" must reach the client as a 404, not be re-wrapped as a 500
+        raise
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete(path="/users/{id}/follow/{follow_id}", response_model=dict)
-def remove_follow(id: int, follow_id: int):
+async def remove_follow(id: int, follow_id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        if not es.exists(index=INDEX_NAME, id=str(follow_id)):
+        if follow_id not in user_cache and not await es.exists(index=INDEX_NAME, id=str(follow_id)):
             raise HTTPException(status_code=404, detail="Follow user not found")
         
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
-        user_doc["following"] = [f for f in user_doc.get("following", []) if f != follow_id]
-        es.update(index=INDEX_NAME, id=str(id), body={"doc": {"following": user_doc["following"]}})
+        # Remove atomically on the ES side; not following is a noop (no reindex)
+        res = await es.update(
+            index=INDEX_NAME,
+            id=str(id),
+            body={
+                "script": {
+                    "lang": "painless",
+                    "source": """
+                        if (ctx._source.following == null || !ctx._source.following.removeAll(Collections.singleton(params.follow_id))) {
+                            ctx.op = 'noop';
+                        }
+                    """,
+                    "params": {"follow_id": follow_id}
+                }
+            },
+            _source=True
+        )
+        user_cache.pop(id, None)
         
-        return {"id": id, "following": user_doc["following"]}
+        return {"id": id, "following": res["get"]["_source"].get("following", [])}
+    except HTTPException:
+        # "Follow user not found" must reach the client as a 404, not be re-wrapped as a 500
+        raise
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -416,16 +555,20 @@ def remove_follow(id: int, follow_id: int):
 ---
 // routes/get_matches.py
 // New file
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Query, HTTPException
 from elasticsearch.exceptions import NotFoundError
-from typing import List
+from typing import List, Optional
 from ..models import User
-from ..db import es, INDEX_NAME
+from ..db import es, INDEX_NAME, USER_FIELDS, HITS_FILTER_PATH, hits_of
 
 router = APIRouter()
 
 @router.get(path="/users/{id}/matches", response_model=List[User])
-def get_matches(id: int):
+async def get_matches(
+    id: int,
+    size: int = Query(50, ge=1, le=1000),
+    after: Optional[int] = Query(None)
+):
     """
     Retrieve users who match with the user (id) based on gender, interested_in, status, and following.
     A match occurs when:
@@ -433,22 +576,22 @@ def get_matches(id: int):
     - User B is interested in User A's gender.
     - Both users have status 'single'.
     - User A follows User B.
+    Results are ordered numerically by the `id` doc-value field (not `_id`, which sorts as a string and
+    needs fielddata): pass the last returned match's id as `after` to get the next page.
     """
     try:
-        # Check if the user exists
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Get the user's document
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        # Get the user's document (raises NotFoundError if the user doesn't exist)
+        user_doc = (await es.get(
+            index=INDEX_NAME, id=str(id), _source=["gender", "interested_in", "status", "following"]
+        ))["_source"]
         user_gender = user_doc.get("gender")
         user_interested_in = user_doc.get("interested_in")
         user_following = user_doc.get("following", [])
         user_status = user_doc.get("status")
 
-        # Ensure the user is single
-        if user_status != "single":
-            return []  # No matches if the user is not single
+        # Ensure the user is single and follows someone; otherwise there is nothing to search
+        if user_status != "single" or not user_following:
+            return []
 
         # Query for potential matches:
         # - Gender matches user's interested_in
@@ -467,15 +610,15 @@ def get_matches(id: int):
         }
 
         # Execute the search
-        res = es.search(index=INDEX_NAME, body={"query": query}, size=10000)
+        body = {"query": query, "_source": USER_FIELDS, "sort": [{"id": "asc"}]}
+        if after is not None:
+            body["search_after"] = [after]
+        res = await es.search(index=INDEX_NAME, body=body, size=size, filter_path=HITS_FILTER_PATH)
         
         # Process matches into User model
         matches = []
-        for hit in res["hits"]["hits"]:
+        for hit in hits_of(res):
             source = hit["_source"]
-            # Convert location from [lon, lat] to dict format
-            if "location" in source and isinstance(source["location"], list):
-                source["location"] = {"lon": source["location"][0], "lat": source["location"][1]}
             matches.append(User(id=int(hit["_id"]), **source))
         
         return matches
@@ -487,7 +630,10 @@ def get_matches(id: int):
 ---
 // main.py
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from db import es, init_index
 from routes.create_user import router as create_router
+from routes.bulk_create import router as bulk_create_router
 from routes.get_user import router as get_router
 from routes.update_user import router as update_router
 from routes.delete_user import router as delete_router
@@ -499,10 +645,19 @@ from routes.get_following import router as get_following_router
 from routes.follow import router as follow_router
 // from routes.get_matches import router as get_matches_router  # New import
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+@app.on_event("startup")
+async def startup():
+    await init_index()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await es.close()
 
 # Include all routers
 app.include_router(create_router)
+app.include_router(bulk_create_router)
 app.include_router(get_router)
 app.include_router(update_router)
 app.include_router(delete_router)
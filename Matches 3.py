@@ -1,18 +1,17 @@
 from fastapi import APIRouter, HTTPException
 from elasticsearch.exceptions import NotFoundError
 from typing import List
+import numpy as np
 from ..models import User
 from ..db import es, INDEX_NAME
 
 router = APIRouter()
 
 @router.get(path="/users/{id}/matches", response_model=List[User])
-def get_matches(id: int):
+async def get_matches(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        # A missing user raises NotFoundError, handled below as a 404
+        user_doc = (await es.get(index=INDEX_NAME, id=str(id)))["_source"]
         user_status = user_doc.get("status")
         user_location = [user_doc.get("x", 0), user_doc.get("y", 0)]
         user_hobbies = set(user_doc.get("hobbies", []))
@@ -29,32 +28,31 @@ def get_matches(id: int):
             }
         }
 
-        res = es.search(index=INDEX_NAME, body={"query": query}, size=10000)
+        res = await es.search(index=INDEX_NAME, body={"query": query}, size=10000)
+        hits = res["hits"]["hits"]
+        
+        # Score all hits at once: common hobby counts and distances as arrays
+        xs = np.fromiter((hit["_source"].get("x", 0) for hit in hits), dtype=np.float64, count=len(hits))
+        ys = np.fromiter((hit["_source"].get("y", 0) for hit in hits), dtype=np.float64, count=len(hits))
+        common_hobbies = np.fromiter(
+            (len(user_hobbies.intersection(hit["_source"].get("hobbies", []))) for hit in hits),
+            dtype=np.int64,
+            count=len(hits)
+        )
+        distances = np.hypot(xs - user_location[0], ys - user_location[1])
         
+        # Most common hobbies first, then closest
         matches = []
-        for hit in res["hits"]["hits"]:
+        for i in np.lexsort((distances, -common_hobbies)):
+            hit = hits[i]
             source = hit["_source"]
-            match_id = int(hit["_id"])
-            match_hobbies = set(source.get("hobbies", []))
-            common_hobbies = len(user_hobbies.intersection(match_hobbies))
-            
-            match_location = [source.get("x", 0), source.get("y", 0)]
-            distance = ((user_location[0] - match_location[0]) ** 2 + 
-                       (user_location[1] - match_location[1]) ** 2) ** 0.5
-            
             if "x" in source and "y" in source:
                 source["location"] = {"lon": source["x"], "lat": source["y"]}
             else:
                 source["location"] = {"lon": 0, "lat": 0}
-                
-            matches.append({
-                "user": User(id=match_id, **source),
-                "common_hobbies": common_hobbies,
-                "distance": distance
-            })
+            matches.append(User(id=int(hit["_id"]), **source))
         
-        matches.sort(key=lambda x: (-x["common_hobbies"], x["distance"]))
-        return [match["user"] for match in matches]
+        return matches
     
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
@@ -7,15 +7,13 @@ from ..db import es, INDEX_NAME
 router = APIRouter()
 
 @router.get(path="/users/{id}/matches", response_model=List[User])
-def get_matches(id: int):
+async def get_matches(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        # A missing user raises NotFoundError, handled below as a 404
+        user_doc = (await es.get(index=INDEX_NAME, id=str(id)))["_source"]
         user_status = user_doc.get("status")
         user_location = [user_doc.get("x", 0), user_doc.get("y", 0)]
-        user_hobbies = set(user_doc.get("hobbies", []))
+        user_hobbies = user_doc.get("hobbies", [])
         user_gender = user_doc.get("gender")
         user_interested_in = user_doc.get("interested_in")
 
@@ -29,36 +27,48 @@ def get_matches(id: int):
                     {"term": {"gender": user_interested_in}},
                     {"term": {"interested_in": user_gender}},
                     {"bool": {"must_not": {"term": {"_id": str(id)}}}}
+                ],
+                # Each shared hobby adds exactly 1 to the score, so _score is the common hobby count
+                "should": [
+                    {"constant_score": {"filter": {"term": {"hobbies": hobby}}}}
+                    for hobby in user_hobbies
                 ]
             }
         }
 
-        res = es.search(index=INDEX_NAME, body={"query": query}, size=10000)
+        # Most common hobbies first, then closest. Docs store plain x/y coordinates (no geo_point), so
+        # distance is the same Euclidean metric as before, computed from doc values; missing coordinates count as 0
+        sort = [
+            {"_score": {"order": "desc"}},
+            {
+                "_script": {
+                    "type": "number",
+                    "order": "asc",
+                    "script": {
+                        "lang": "painless",
+                        "source": """
+                            double x = doc['x'].size() == 0 ? 0 : doc['x'].value;
+                            double y = doc['y'].size() == 0 ? 0 : doc['y'].value;
+                            return Math.sqrt(Math.pow(x - params.x, 2) + Math.pow(y - params.y, 2));
+                        """,
+                        "params": {"x": user_location[0], "y": user_location[1]}
+                    }
+                }
+            }
+        ]
+
+        res = await es.search(index=INDEX_NAME, body={"query": query, "sort": sort}, size=10000)
         
         matches = []
         for hit in res["hits"]["hits"]:
             source = hit["_source"]
-            match_id = int(hit["_id"])
-            match_hobbies = set(source.get("hobbies", []))
-            common_hobbies = len(user_hobbies.intersection(match_hobbies))
-            
-            match_location = [source.get("x", 0), source.get("y", 0)]
-            distance = ((user_location[0] - match_location[0]) ** 2 + 
-                       (user_location[1] - match_location[1]) ** 2) ** 0.5
-            
             if "x" in source and "y" in source:
                 source["location"] = {"lon": source["x"], "lat": source["y"]}
             else:
                 source["location"] = {"lon": 0, "lat": 0}
-                
-            matches.append({
-                "user": User(id=match_id, **source),
-                "common_hobbies": common_hobbies,
-                "distance": distance
-            })
+            matches.append(User(id=int(hit["_id"]), **source))
         
-        matches.sort(key=lambda x: (x["common_hobbies"], -x["distance"]), reverse=True)
-        return [match["user"] for match in matches]
+        return matches
     
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
@@ -7,12 +7,10 @@ from ..db import es, INDEX_NAME
 router = APIRouter()
 
 @router.get(path="/users/{id}/matches", response_model=List[User])
-def get_matches(id: int):
+async def get_matches(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        # A missing user raises NotFoundError, handled below as a 404
+        user_doc = (await es.get(index=INDEX_NAME, id=str(id)))["_source"]
         user_status = user_doc.get("status")
         user_location = [user_doc.get("x", 0), user_doc.get("y", 0)]
         user_hobbies = user_doc.get("hobbies", [])
@@ -25,32 +23,17 @@ def get_matches(id: int):
                 "filter": [
                     {"term": {"status": "single"}},
                     {"bool": {"must_not": {"term": {"_id": str(id)}}}}
+                ],
+                # Each shared hobby adds exactly 1 to the score, so _score is the common hobby count
+                "should": [
+                    {"constant_score": {"filter": {"term": {"hobbies": hobby}}}}
+                    for hobby in user_hobbies
                 ]
             }
         }
 
         sort = [
-            {
-                "_script": {
-                    "type": "number",
-                    "script": {
-                        "lang": "painless",
-                        "source": """
-                            def user_hobbies = params.user_hobbies;
-                            def doc_hobbies = doc['hobbies'];
-                            int common = 0;
-                            for (hobby in user_hobbies) {
-                                if (doc_hobbies.contains(hobby)) {
-                                    common++;
-                                }
-                            }
-                            return common;
-                        """,
-                        "params": {"user_hobbies": user_hobbies}
-                    },
-                    "order": "desc"
-                }
-            },
+            {"_score": {"order": "desc"}},
             {
                 "_geo_distance": {
                     "location": {"lat": user_location[1], "lon": user_location[0]},
@@ -60,7 +43,7 @@ def get_matches(id: int):
             }
         ]
 
-        res = es.search(index=INDEX_NAME, body={"query": query, "sort": sort}, size=10000)
+        res = await es.search(index=INDEX_NAME, body={"query": query, "sort": sort}, size=10000)
         
         matches = []
         for hit in res["hits"]["hits"]:
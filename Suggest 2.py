@@ -7,47 +7,60 @@ from ..db import es, INDEX_NAME
 router = APIRouter()
 
 @router.get(path="/users/{id}/suggestions", response_model=List[User])
-def get_user_suggestions(id: int):
+async def get_user_suggestions(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        user_doc = (await es.get(index=INDEX_NAME, id=str(id)))["_source"]
         user_status = user_doc.get("status")
         user_following = user_doc.get("following", [])
         
         if user_status != "single":
             return []
         
-        suggested_ids = set()
-        for followed_id in user_following:
-            if es.exists(index=INDEX_NAME, id=str(followed_id)):
-                followed_doc = es.get(index=INDEX_NAME, id=str(followed_id))["_source"]
-                followed_following = followed_doc.get("following", [])
-                suggested_ids.update(followed_following)
-        
-        suggested_ids.discard(id)
-        for fid in user_following:
-            suggested_ids.discard(fid)
-        
         suggestions = []
-        for sid in suggested_ids:
-            if es.exists(index=INDEX_NAME, id=str(sid)):
-                doc = es.get(index=INDEX_NAME, id=str(sid))["_source"]
-                if doc.get("status") == "single":
-                    if "location" in doc and isinstance(doc["location"], list):
-                        doc["location"] = {"lon": doc["location"][0], "lat": doc["location"][1]}
-                    suggestions.append(
-                        User(
-                            id=sid,
-                            name=doc["name"],
-                            gender=doc["gender"],
-                            status=doc["status"],
-                            interested_in=doc.get("interested_in"),
-                            following=[],
-                            location=doc["location"]
-                        )
-                    )
+        if not user_following:
+            return suggestions
+
+        # Friends of friends computed by ES, most shared candidates first
+        res = await es.search(
+            index=INDEX_NAME,
+            body={
+                "size": 0,
+                "query": {"ids": {"values": [str(f) for f in user_following]}},
+                "aggs": {
+                    "candidates": {
+                        "terms": {"field": "following", "size": 10000, "exclude": [id] + user_following}
+                    }
+                }
+            }
+        )
+        ids = [str(bucket["key"]) for bucket in res["aggregations"]["candidates"]["buckets"]]
+        if not ids:
+            return suggestions
+
+        # Only single users can be suggested, so let ES filter them out
+        rank = {sid: i for i, sid in enumerate(ids)}
+        query = {
+            "bool": {
+                "filter": [
+                    {"ids": {"values": ids}},
+                    {"term": {"status": "single"}}
+                ]
+            }
+        }
+        res = await es.search(index=INDEX_NAME, body={"query": query}, size=len(ids))
+        for hit in sorted(res["hits"]["hits"], key=lambda hit: rank[hit["_id"]]):
+            doc = hit["_source"]
+            suggestions.append(
+                User(
+                    id=int(hit["_id"]),
+                    name=doc["name"],
+                    gender=doc["gender"],
+                    status=doc["status"],
+                    interested_in=doc.get("interested_in"),
+                    following=[],
+                    location=doc["location"]
+                )
+            )
         
         return suggestions
     except NotFoundError:
@@ -1,3 +1,5 @@
+import itertools
+import numpy as np
 from fastapi import APIRouter, HTTPException
 from elasticsearch.exceptions import NotFoundError
 from typing import List
@@ -7,51 +9,59 @@ from ..db import es, INDEX_NAME
 router = APIRouter()
 
 @router.get(path="/users/{id}/suggestions", response_model=List[User])
-def get_user_suggestions(id: int):
+async def get_user_suggestions(id: int):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(id))["_source"]
+        # A missing user raises NotFoundError, handled below as a 404
+        user_doc = (await es.get(
+            index=INDEX_NAME, id=str(id), _source=["gender", "interested_in", "status", "following"]
+        ))["_source"]
         user_gender = user_doc.get("gender")
         user_interested_in = user_doc.get("interested_in")
         user_status = user_doc.get("status")
         user_following = user_doc.get("following", [])
         
-        if user_status != "single":
+        # Nothing to suggest unless the user is single, follows someone and has a complete profile
+        if user_status != "single" or not user_following or user_gender is None or user_interested_in is None:
             return []
         
-        suggested_ids = set()
-        for followed_id in user_following:
-            if es.exists(index=INDEX_NAME, id=str(followed_id)):
-                followed_doc = es.get(index=INDEX_NAME, id=str(followed_id))["_source"]
-                followed_following = followed_doc.get("following", [])
-                suggested_ids.update(followed_following)
+        # One mget for the followed users' own following lists
+        res = await es.mget(index=INDEX_NAME, body={"ids": [str(f) for f in user_following]}, _source=["following"])
+        followed_followings = (doc["_source"].get("following", []) for doc in res["docs"] if doc["found"])
+        
+        # Friends-of-friends minus the user and users already followed, deduplicated in vectorized C
+        all_fof = np.fromiter(itertools.chain.from_iterable(followed_followings), dtype=np.int64)
+        candidates = np.setdiff1d(all_fof, np.array([id, *user_following], dtype=np.int64))
+        if candidates.size == 0:
+            return []
+        suggested_ids = candidates.tolist()
         
-        suggested_ids.discard(id)
-        for fid in user_following:
-            suggested_ids.discard(fid)
+        # One query for the candidates: ES drops profiles that don't match
+        query = {
+            "bool": {
+                "filter": [
+                    {"ids": {"values": [str(s) for s in suggested_ids]}},
+                    {"term": {"status": "single"}},
+                    {"term": {"gender": user_interested_in}},
+                    {"term": {"interested_in": user_gender}}
+                ]
+            }
+        }
+        res = await es.search(index=INDEX_NAME, body={"query": query}, size=len(suggested_ids))
         
         suggestions = []
-        for sid in suggested_ids:
-            if es.exists(index=INDEX_NAME, id=str(sid)):
-                doc = es.get(index=INDEX_NAME, id=str(sid))["_source"]
-                if (doc.get("status") == "single" and
-                    doc.get("gender") == user_interested_in and
-                    doc.get("interested_in") == user_gender):
-                    if "location" in doc and isinstance(doc["location"], list):
-                        doc["location"] = {"lon": doc["location"][0], "lat": doc["location"][1]}
-                    suggestions.append(
-                        User(
-                            id=sid,
-                            name=doc["name"],
-                            gender=doc["gender"],
-                            status=doc["status"],
-                            interested_in=doc.get("interested_in"),
-                            following=[],
-                            location=doc["location"]
-                        )
-                    )
+        for hit in res["hits"]["hits"]:
+            doc = hit["_source"]
+            suggestions.append(
+                User(
+                    id=int(hit["_id"]),
+                    name=doc["name"],
+                    gender=doc["gender"],
+                    status=doc["status"],
+                    interested_in=doc.get("interested_in"),
+                    following=[],
+                    location=doc["location"]
+                )
+            )
         
         return suggestions
     except NotFoundError:
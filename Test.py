@@ -1,410 +1,505 @@
 // test_api.py
-import unittest
-import json
-from unittest.mock import patch, MagicMock
-from fastapi.testclient import TestClient
-from main import app  # Import the FastAPI app
-
-client = TestClient(app)
-
-# Mock Elasticsearch to avoid real connections
-@patch('db.es')
-class TestCreateUser(unittest.TestCase):
-    def setUp(self):
-        self.user_data = {
-            "id": 1,
-            "name": "John Doe",
-            "gender": "male",
-            "status": "single",
-            "interested_in": "female",
-            "following": [2],
-            "location": {"lon": -122.4194, "lat": 37.7749}
-        }
-
-    def test_create_user_success(self, mock_es):
+import pytest
+from unittest.mock import AsyncMock
+from elasticsearch.exceptions import NotFoundError
+from db import user_cache
+
+# aclient comes from conftest.py; every test runs on the session event loop
+pytestmark = pytest.mark.asyncio
+
+# Each route module binds es with "from ..db import es" at import time, so the mock is patched
+# where it is used; this overrides conftest.py's mock_es, which targets the root main.py app
+ROUTE_MODULES = [
+    "routes.create_user", "routes.bulk_create", "routes.get_user", "routes.update_user",
+    "routes.delete_user", "routes.suggestions", "routes.delete_all", "routes.get_all",
+    "routes.get_followers", "routes.get_following", "routes.follow", "routes.get_matches",
+]
+
+@pytest.fixture
+def mock_es(monkeypatch):
+    mock = AsyncMock()
+    for module in ROUTE_MODULES:
+        monkeypatch.setattr(f"{module}.es", mock)
+    return mock
+
+# async_bulk is imported into the route module, so it is patched there
+@pytest.fixture
+def mock_bulk(monkeypatch):
+    mock = AsyncMock()
+    monkeypatch.setattr('routes.bulk_create.async_bulk', mock)
+    return mock
+
+class TestCreateUser:
+    USER_DATA = {
+        "id": 1,
+        "name": "John Doe",
+        "gender": "male",
+        "status": "single",
+        "interested_in": "female",
+        "following": [2],
+        "location": {"lon": -122.4194, "lat": 37.7749}
+    }
+
+    @pytest.fixture
+    def user_data(self):
+        return dict(self.USER_DATA)
+
+    async def test_create_user_success(self, aclient, mock_es, user_data):
         mock_es.exists.return_value = False
         mock_es.index.return_value = {"result": "created"}
 
-        response = client.post("/users/", json=self.user_data)
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["id"], 1)
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 200
+        assert response.json()["id"] == 1
         mock_es.index.assert_called_once()
 
-    def test_create_user_missing_id(self, mock_es):
-        del self.user_data["id"]
-        response = client.post("/users/", json=self.user_data)
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("User ID is required", response.json()["detail"])
+    async def test_create_user_missing_id(self, aclient, user_data):
+        del user_data["id"]
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 400
+        assert "User ID is required" in response.json()["detail"]
 
-    def test_create_user_already_exists(self, mock_es):
+    async def test_create_user_already_exists(self, aclient, mock_es, user_data):
         mock_es.exists.return_value = True
-        response = client.post("/users/", json=self.user_data)
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("User with this ID already exists", response.json()["detail"])
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 400
+        assert "User with this ID already exists" in response.json()["detail"]
 
 -------------
-@patch('db.es')
-class TestGetUser(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.user_data = {
-            "name": "John Doe",
-            "gender": "male",
-            "status": "single",
-            "interested_in": "female",
-            "following": [2],
-            "location": [-122.4194, 37.7749]  # ES format
-        }
+class TestBulkCreateUsers:
+    USERS_DATA = [
+        {"id": 1, "name": "John Doe", "gender": "male", "status": "single", "following": [2], "location": {"lon": -122.4194, "lat": 37.7749}},
+        {"id": 2, "name": "Jane Doe", "gender": "female", "status": "single", "following": [], "location": {"lon": -122.42, "lat": 37.77}}
+    ]
+
+    @pytest.fixture
+    def users_data(self):
+        return [dict(user) for user in self.USERS_DATA]
+
+    async def test_bulk_create_success(self, aclient, mock_bulk, users_data):
+        mock_bulk.return_value = (2, [])
+
+        response = await aclient.post("/users/bulk", json=users_data)
+        assert response.status_code == 200
+        assert response.json() == {"created": 2, "failed": []}
+        mock_bulk.assert_called_once()
 
-    def test_get_user_success(self, mock_es):
-        mock_es.get.return_value = {"_source": self.user_data}
+    async def test_bulk_create_existing_user(self, aclient, mock_bulk, users_data):
+        mock_bulk.return_value = (1, [{"create": {"_id": "2", "status": 409}}])
 
-        response = client.get(f"/users/{self.user_id}")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["name"], "John Doe")
-        self.assertIn("location", response.json())
+        response = await aclient.post("/users/bulk", json=users_data)
+        assert response.status_code == 200
+        assert response.json() == {"created": 1, "failed": [2]}
 
-    def test_get_user_not_found(self, mock_es):
+    async def test_bulk_create_missing_id(self, aclient, mock_bulk, users_data):
+        del users_data[1]["id"]
+
+        response = await aclient.post("/users/bulk", json=users_data)
+        assert response.status_code == 400
+        assert "User ID is required" in response.json()["detail"]
+        mock_bulk.assert_not_called()
+
+-------------
+class TestGetUser:
+    user_id = 1
+    USER_DATA = {
+        "name": "John Doe",
+        "gender": "male",
+        "status": "single",
+        "interested_in": "female",
+        "following": [2],
+        "location": {"lon": -122.4194, "lat": 37.7749}
+    }
+
+    @pytest.fixture(autouse=True)
+    def clear_user_cache(self):
+        user_cache.clear()
+
+    async def test_get_user_success(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": self.USER_DATA}
+
+        response = await aclient.get(f"/users/{self.user_id}")
+        assert response.status_code == 200
+        assert response.json()["name"] == "John Doe"
+        assert "location" in response.json()
+
+    async def test_get_user_cached(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": self.USER_DATA}
+
+        await aclient.get(f"/users/{self.user_id}")
+        response = await aclient.get(f"/users/{self.user_id}")
+        assert response.status_code == 200
+        assert response.json()["name"] == "John Doe"
+        mock_es.get.assert_called_once()
+
+    async def test_get_user_not_found(self, aclient, mock_es):
         mock_es.get.side_effect = Exception("Not Found")  # Simulate NotFoundError
 
-        response = client.get(f"/users/{self.user_id}")
-        self.assertEqual(response.status_code, 404)
-        self.assertIn("User not found", response.json()["detail"])
+        response = await aclient.get(f"/users/{self.user_id}")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
 
-    def test_get_user_error(self, mock_es):
+    async def test_get_user_error(self, aclient, mock_es):
         mock_es.get.side_effect = Exception("Connection error")
 
-        response = client.get(f"/users/{self.user_id}")
-        self.assertEqual(response.status_code, 500)
-        self.assertIn("Connection error", response.json()["detail"])
+        response = await aclient.get(f"/users/{self.user_id}")
+        assert response.status_code == 500
+        assert "Connection error" in response.json()["detail"]
 
 -------------
-@patch('db.es')
-class TestUpdateUser(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.update_data = {"name": "Jane Doe"}
+class TestUpdateUser:
+    user_id = 1
+    UPDATE_DATA = {"name": "Jane Doe"}
 
-    def test_update_user_success(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.update.return_value = {"result": "updated"}
-        mock_es.get.return_value = {"_source": {"name": "Jane Doe", "location": [-122.4194, 37.7749]}}
+    async def test_update_user_success(self, aclient, mock_es):
+        mock_es.update.return_value = {"result": "updated", "get": {"_source": {"name": "Jane Doe", "location": {"lon": -122.4194, "lat": 37.7749}}}}
 
-        response = client.patch(f"/users/{self.user_id}", json=self.update_data)
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["name"], "Jane Doe")
+        response = await aclient.patch(f"/users/{self.user_id}", json=self.UPDATE_DATA)
+        assert response.status_code == 200
+        assert response.json()["name"] == "Jane Doe"
+        mock_es.get.assert_not_called()
 
-    def test_update_user_not_found(self, mock_es):
-        mock_es.exists.return_value = False
+    async def test_update_user_not_found(self, aclient, mock_es):
+        mock_es.update.side_effect = NotFoundError(404, "not_found", {})
 
-        response = client.patch(f"/users/{self.user_id}", json=self.update_data)
-        self.assertEqual(response.status_code, 404)
-        self.assertIn("User not found", response.json()["detail"])
+        response = await aclient.patch(f"/users/{self.user_id}", json=self.UPDATE_DATA)
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
 
-    def test_update_user_no_fields(self, mock_es):
-        response = client.patch(f"/users/{self.user_id}", json={})
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("No fields provided for update", response.json()["detail"])
+    async def test_update_user_no_fields(self, aclient):
+        response = await aclient.patch(f"/users/{self.user_id}", json={})
+        assert response.status_code == 400
+        assert "No fields provided for update" in response.json()["detail"]
 
-    def test_update_user_location(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.update.return_value = {"result": "updated"}
+    async def test_update_user_location(self, aclient, mock_es):
         update_with_location = {"location": {"lon": -122.42, "lat": 37.77}}
-        mock_es.get.return_value = {"_source": {"location": [-122.42, 37.77]}}
+        mock_es.update.return_value = {"result": "updated", "get": {"_source": {"location": {"lon": -122.42, "lat": 37.77}}}}
 
-        response = client.patch(f"/users/{self.user_id}", json=update_with_location)
-        self.assertEqual(response.status_code, 200)
+        response = await aclient.patch(f"/users/{self.user_id}", json=update_with_location)
+        assert response.status_code == 200
+        assert mock_es.update.call_args.kwargs["body"]["doc"]["location"] == {"lon": -122.42, "lat": 37.77}
 
 -------------
-@patch('db.es')
-class TestDeleteUser(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
+class TestDeleteUser:
+    user_id = 1
 
-    def test_delete_user_success(self, mock_es):
-        mock_es.exists.return_value = True
+    async def test_delete_user_success(self, aclient, mock_es):
         mock_es.delete.return_value = {"result": "deleted"}
 
-        response = client.delete(f"/users/{self.user_id}")
-        self.assertEqual(response.status_code, 204)
+        response = await aclient.delete(f"/users/{self.user_id}")
+        assert response.status_code == 204
+        mock_es.exists.assert_not_called()
 
-    def test_delete_user_not_found(self, mock_es):
-        mock_es.exists.return_value = False
+    async def test_delete_user_not_found(self, aclient, mock_es):
+        mock_es.delete.side_effect = NotFoundError(404, "not_found", {})
 
-        response = client.delete(f"/users/{self.user_id}")
-        self.assertEqual(response.status_code, 404)
-        self.assertIn("User not found", response.json()["detail"])
+        response = await aclient.delete(f"/users/{self.user_id}")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
 
-    def test_delete_user_error(self, mock_es):
-        mock_es.exists.return_value = True
+    async def test_delete_user_error(self, aclient, mock_es):
         mock_es.delete.return_value = {"result": "error"}
 
-        response = client.delete(f"/users/{self.user_id}")
-        self.assertEqual(response.status_code, 500)
-        self.assertIn("Failed to delete user", response.json()["detail"])
+        response = await aclient.delete(f"/users/{self.user_id}")
+        assert response.status_code == 500
+        assert "Failed to delete user" in response.json()["detail"]
 
 -------------
-@patch('db.es')
-class TestSuggestions(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.user_doc = {"following": [2]}
+class TestSuggestions:
+    user_id = 1
+    USER_DOC = {"following": [2]}
+
+    async def test_get_suggestions_success(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": self.USER_DOC}
+        mock_es.search.side_effect = [
+            {"aggregations": {"candidates": {"buckets": [{"key": 3, "doc_count": 1}]}}},
+            {"hits": {"hits": [{"_id": "3", "_source": {"name": "Suggested", "gender": "female", "status": "single", "interested_in": "male", "following": [], "location": {"lon": -122.42, "lat": 37.77}}}]}}
+        ]
 
-    def test_get_suggestions_success(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.get.return_value = {"_source": self.user_doc}
-        mock_es.get.side_effect = lambda *args, **kwargs: {"_source": {"following": [3]}} if "2" in args[1] else {"_source": {"name": "Suggested", "gender": "female", "status": "single", "interested_in": "male", "following": [], "location": [-122.42, 37.77]}}
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 200
+        assert isinstance(response.json(), list)
+        assert mock_es.search.call_count == 2
 
-        response = client.get(f"/users/{self.user_id}/suggestions")
-        self.assertEqual(response.status_code, 200)
-        self.assertIsInstance(response.json(), list)
+    async def test_get_suggestions_no_candidates(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": self.USER_DOC}
+        mock_es.search.return_value = {"aggregations": {"candidates": {"buckets": []}}}
 
-    def test_get_suggestions_user_not_found(self, mock_es):
-        mock_es.exists.return_value = False
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_es.search.assert_called_once()
+        aggs = mock_es.search.call_args.kwargs["body"]["aggs"]
+        assert aggs["candidates"]["terms"]["exclude"] == [self.user_id, 2]
 
-        response = client.get(f"/users/{self.user_id}/suggestions")
-        self.assertEqual(response.status_code, 404)
-        self.assertIn("User not found", response.json()["detail"])
+    async def test_get_suggestions_user_not_found(self, aclient, mock_es):
+        mock_es.get.side_effect = NotFoundError(404, "not_found", {})
 
-    def test_get_suggestions_no_suggestions(self, mock_es):
-        mock_es.exists.return_value = True
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+
+    async def test_get_suggestions_no_suggestions(self, aclient, mock_es):
         mock_es.get.return_value = {"_source": {"following": []}}
 
-        response = client.get(f"/users/{self.user_id}/suggestions")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), [])
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 200
+        assert response.json() == []
 
 -------------
-@patch('db.es')
-class TestDeleteAllUsers(unittest.TestCase):
-    def test_delete_all_users_success(self, mock_es):
+class TestDeleteAllUsers:
+    async def test_delete_all_users_success(self, aclient, mock_es):
         mock_es.delete_by_query.return_value = {"deleted": 5}
 
-        response = client.delete("/users/")
-        self.assertEqual(response.status_code, 204)
+        response = await aclient.delete("/users/")
+        assert response.status_code == 204
 
-    def test_delete_all_users_error(self, mock_es):
+    async def test_delete_all_users_error(self, aclient, mock_es):
         mock_es.delete_by_query.side_effect = Exception("Error")
 
-        response = client.delete("/users/")
-        self.assertEqual(response.status_code, 500)
-        self.assertIn("Failed to delete all users", response.json()["detail"])
+        response = await aclient.delete("/users/")
+        assert response.status_code == 500
+        assert "Failed to delete all users" in response.json()["detail"]
 
 -------------
-@patch('db.es')
-class TestGetAllUsers(unittest.TestCase):
-    def setUp(self):
-        self.users_data = [
-            {"_id": "1", "_source": {"name": "John", "gender": "male", "status": "single", "interested_in": "female", "following": [2], "location": [-122.4194, 37.7749]}}
-        ]
-
-    def test_get_all_users_success(self, mock_es):
-        mock_es.search.return_value = {"hits": {"hits": self.users_data}}
-
-        response = client.get("/users/")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
-        self.assertEqual(response.json()[0]["name"], "John")
-
-    def test_get_all_users_with_filter(self, mock_es):
-        mock_es.search.return_value = {"hits": {"hits": []}}
-        response = client.get("/users/?gender=male&status=single")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), [])
-
-    def test_get_all_users_location_filter_invalid(self, mock_es):
-        response = client.get("/users/?lon=1")
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("Both lon and lat must be provided", response.json()["detail"])
-
-    def test_get_all_users_error(self, mock_es):
+class TestGetAllUsers:
+    USERS_DATA = [
+        {"_id": "1", "_source": {"name": "John", "gender": "male", "status": "single", "interested_in": "female", "following": [2], "location": {"lon": -122.4194, "lat": 37.7749}}}
+    ]
+
+    async def test_get_all_users_success(self, aclient, mock_es):
+        mock_es.search.return_value = {"hits": {"hits": self.USERS_DATA}}
+
+        response = await aclient.get("/users/")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert response.json()[0]["name"] == "John"
+        assert mock_es.search.call_args.kwargs["filter_path"] == ["hits.hits._id", "hits.hits._source"]
+
+    async def test_get_all_users_with_filter(self, aclient, mock_es):
+        mock_es.search.return_value = {}  # filter_path strips empty hits
+        response = await aclient.get("/users/?gender=male&status=single")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    async def test_get_all_users_pagination(self, aclient, mock_es):
+        mock_es.search.return_value = {"hits": {"hits": self.USERS_DATA}}
+
+        response = await aclient.get("/users/?size=1&after=0")
+        assert response.status_code == 200
+        assert mock_es.search.call_args.kwargs["size"] == 1
+        assert mock_es.search.call_args.kwargs["body"]["sort"] == [{"id": "asc"}]
+        assert mock_es.search.call_args.kwargs["body"]["search_after"] == [0]
+
+    async def test_get_all_users_size_too_large(self, aclient):
+        response = await aclient.get("/users/?size=5000")
+        assert response.status_code == 422
+
+    async def test_get_all_users_location_filter_invalid(self, aclient):
+        response = await aclient.get("/users/?lon=1")
+        assert response.status_code == 400
+        assert "Both lon and lat must be provided" in response.json()["detail"]
+
+    async def test_get_all_users_error(self, aclient, mock_es):
         mock_es.search.side_effect = Exception("Error")
 
-        response = client.get("/users/")
-        self.assertEqual(response.status_code, 500)
-        self.assertIn("Error", response.json()["detail"])
+        response = await aclient.get("/users/")
+        assert response.status_code == 500
+        assert "Error" in response.json()["detail"]
 
 -------------
-@patch('db.es')
-class TestGetFollowers(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.followers_data = [
-            {"_id": "2", "_source": {"name": "Follower", "gender": "female", "status": "single", "interested_in": "male", "following": [1], "location": [-122.42, 37.77]}}
-        ]
+class TestGetFollowers:
+    user_id = 1
+    FOLLOWERS_DATA = [
+        {"_id": "2", "_source": {"name": "Follower", "gender": "female", "status": "single", "interested_in": "male", "following": [1], "location": {"lon": -122.42, "lat": 37.77}}}
+    ]
 
-    def test_get_followers_success(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.search.return_value = {"hits": {"hits": self.followers_data}}
+    async def test_get_followers_success(self, aclient, mock_es):
+        mock_es.search.return_value = {"hits": {"hits": self.FOLLOWERS_DATA}}
 
-        response = client.get(f"/users/{self.user_id}/followers")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
+        response = await aclient.get(f"/users/{self.user_id}/followers")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        mock_es.exists.assert_not_called()
 
-    def test_get_followers_no_followers(self, mock_es):
-        mock_es.exists.return_value = True
+    async def test_get_followers_no_followers(self, aclient, mock_es):
         mock_es.search.return_value = {"hits": {"hits": []}}
+        mock_es.exists.return_value = True
 
-        response = client.get(f"/users/{self.user_id}/followers")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), [])
+        response = await aclient.get(f"/users/{self.user_id}/followers")
+        assert response.status_code == 200
+        assert response.json() == []
 
-    def test_get_followers_error(self, mock_es):
-        mock_es.exists.return_value = True
+    async def test_get_followers_user_not_found(self, aclient, mock_es):
+        mock_es.search.return_value = {}  # filter_path strips empty hits
+        mock_es.exists.return_value = False
+
+        response = await aclient.get(f"/users/{self.user_id}/followers")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+
+    async def test_get_followers_error(self, aclient, mock_es):
         mock_es.search.side_effect = Exception("Error")
 
-        response = client.get(f"/users/{self.user_id}/followers")
-        self.assertEqual(response.status_code, 500)
-        self.assertIn("Error", response.json()["detail"])
+        response = await aclient.get(f"/users/{self.user_id}/followers")
+        assert response.status_code == 500
+        assert "Error" in response.json()["detail"]
 
 -------------
-@patch('db.es')
-class TestGetFollowing(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.user_doc = {"following": [2]}
-        self.following_doc = {"name": "Followed", "gender": "female", "status": "single", "interested_in": "male", "following": [], "location": [-122.42, 37.77]}
-
-    def test_get_following_success(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.get.side_effect = [
-            {"_source": self.user_doc},
-            {"_source": self.following_doc}
-        ]
+class TestGetFollowing:
+    user_id = 1
+    USER_DOC = {"following": [2]}
+    FOLLOWING_DOC = {"name": "Followed", "gender": "female", "status": "single", "interested_in": "male", "following": [], "location": {"lon": -122.42, "lat": 37.77}}
 
-        response = client.get(f"/users/{self.user_id}/following")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
+    async def test_get_following_success(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": self.USER_DOC}
+        mock_es.search.return_value = {"hits": {"hits": [{"_id": "2", "_source": self.FOLLOWING_DOC}]}}
 
-    def test_get_following_user_not_found(self, mock_es):
-        mock_es.exists.return_value = False
+        response = await aclient.get(f"/users/{self.user_id}/following")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        mock_es.search.assert_called_once()
 
-        response = client.get(f"/users/{self.user_id}/following")
-        self.assertEqual(response.status_code, 404)
-        self.assertIn("User not found", response.json()["detail"])
+    async def test_get_following_user_not_found(self, aclient, mock_es):
+        mock_es.get.side_effect = NotFoundError(404, "not_found", {})
 
-    def test_get_following_no_following(self, mock_es):
-        mock_es.exists.return_value = True
+        response = await aclient.get(f"/users/{self.user_id}/following")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+
+    async def test_get_following_no_following(self, aclient, mock_es):
         mock_es.get.return_value = {"_source": {"following": []}}
 
-        response = client.get(f"/users/{self.user_id}/following")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), [])
+        response = await aclient.get(f"/users/{self.user_id}/following")
+        assert response.status_code == 200
+        assert response.json() == []
 
 -------------
-@patch('db.es')
-class TestFollow(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.follow_id = 2
-        self.user_doc = {"following": []}
-
-    def test_add_follow_success(self, mock_es):
+class TestFollow:
+    user_id = 1
+    follow_id = 2
+
+    @pytest.fixture(autouse=True)
+    def clear_user_cache(self):
+        user_cache.clear()
+
+    async def test_add_follow_success(self, aclient, mock_es):
         mock_es.exists.return_value = True
-        mock_es.get.return_value = {"_source": self.user_doc}
-        mock_es.update.return_value = {"result": "updated"}
+        mock_es.update.return_value = {"result": "updated", "get": {"_source": {"following": [self.follow_id]}}}
+
+        response = await aclient.post(f"/users/{self.user_id}/follow/{self.follow_id}")
+        assert response.status_code == 200
+        assert response.json()["following"] == [self.follow_id]
+        assert mock_es.update.call_args.kwargs["body"]["script"]["params"] == {"follow_id": self.follow_id}
+        mock_es.get.assert_not_called()
 
-        response = client.post(f"/users/{self.user_id}/follow/{self.follow_id}")
-        self.assertEqual(response.status_code, 200)
-        self.assertIn("following", response.json())
+    async def test_add_follow_self(self, aclient):
+        response = await aclient.post(f"/users/{self.user_id}/follow/{self.user_id}")
+        assert response.status_code == 400
+        assert "Cannot follow self" in response.json()["detail"]
+
+    async def test_add_follow_already_following(self, aclient, mock_es):
+        mock_es.exists.return_value = True
+        mock_es.update.return_value = {"result": "noop", "get": {"_source": {"following": [self.follow_id]}}}
 
-    def test_add_follow_self(self, mock_es):
-        response = client.post(f"/users/{self.user_id}/follow/{self.user_id}")
-        self.assertEqual(response.status_code, 400)
-        self.assertIn("Cannot follow self", response.json()["detail"])
+        response = await aclient.post(f"/users/{self.user_id}/follow/{self.follow_id}")
+        assert response.status_code == 200  # No error, just no change
+        assert response.json()["following"] == [self.follow_id]
 
-    def test_add_follow_already_following(self, mock_es):
+    async def test_add_follow_user_not_found(self, aclient, mock_es):
         mock_es.exists.return_value = True
-        self.user_doc["following"] = [self.follow_id]
-        mock_es.get.return_value = {"_source": self.user_doc}
+        mock_es.update.side_effect = NotFoundError(404, "not_found", {})
 
-        response = client.post(f"/users/{self.user_id}/follow/{self.follow_id}")
-        self.assertEqual(response.status_code, 200)  # No error, just no change
+        response = await aclient.post(f"/users/{self.user_id}/follow/{self.follow_id}")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
 
-    def test_remove_follow_success(self, mock_es):
+    async def test_remove_follow_success(self, aclient, mock_es):
         mock_es.exists.return_value = True
-        self.user_doc["following"] = [self.follow_id]
-        mock_es.get.return_value = {"_source": self.user_doc}
-        mock_es.update.return_value = {"result": "updated"}
+        mock_es.update.return_value = {"result": "updated", "get": {"_source": {"following": []}}}
 
-        response = client.delete(f"/users/{self.user_id}/follow/{self.follow_id}")
-        self.assertEqual(response.status_code, 200)
-        self.assertNotIn(self.follow_id, response.json()["following"])
+        response = await aclient.delete(f"/users/{self.user_id}/follow/{self.follow_id}")
+        assert response.status_code == 200
+        assert self.follow_id not in response.json()["following"]
+        mock_es.get.assert_not_called()
 
-    def test_remove_follow_not_following(self, mock_es):
+    async def test_remove_follow_not_following(self, aclient, mock_es):
         mock_es.exists.return_value = True
-        mock_es.get.return_value = {"_source": self.user_doc}
-        mock_es.update.return_value = {"result": "updated"}
+        mock_es.update.return_value = {"result": "noop", "get": {"_source": {"following": []}}}
 
-        response = client.delete(f"/users/{self.user_id}/follow/{self.follow_id}")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json()["following"], [])
+        response = await aclient.delete(f"/users/{self.user_id}/follow/{self.follow_id}")
+        assert response.status_code == 200
+        assert response.json()["following"] == []
 
 -------------
-@patch('db.es')
-class TestGetMatches(unittest.TestCase):
-    def setUp(self):
-        self.user_id = 1
-        self.user_doc = {
-            "gender": "male",
-            "interested_in": "female",
+class TestGetMatches:
+    user_id = 1
+    USER_DOC = {
+        "gender": "male",
+        "interested_in": "female",
+        "status": "single",
+        "following": [2]
+    }
+    MATCH_DOC = {
+        "_id": "2",
+        "_source": {
+            "gender": "female",
+            "interested_in": "male",
             "status": "single",
-            "following": [2]
-        }
-        self.match_doc = {
-            "_id": "2",
-            "_source": {
-                "gender": "female",
-                "interested_in": "male",
-                "status": "single",
-                "name": "Match",
-                "following": [],
-                "location": [-122.42, 37.77]
-            }
+            "name": "Match",
+            "following": [],
+            "location": {"lon": -122.42, "lat": 37.77}
         }
+    }
 
-    def test_get_matches_success(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.get.return_value = {"_source": self.user_doc}
-        mock_es.search.return_value = {"hits": {"hits": [self.match_doc]}}
+    @pytest.fixture
+    def user_doc(self):
+        return dict(self.USER_DOC)
 
-        response = client.get(f"/users/{self.user_id}/matches")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
-        self.assertEqual(response.json()[0]["name"], "Match")
+    async def test_get_matches_success(self, aclient, mock_es, user_doc):
+        mock_es.get.return_value = {"_source": user_doc}
+        mock_es.search.return_value = {"hits": {"hits": [self.MATCH_DOC]}}
 
-    def test_get_matches_user_not_single(self, mock_es):
-        mock_es.exists.return_value = True
-        self.user_doc["status"] = "married"
-        mock_es.get.return_value = {"_source": self.user_doc}
+        response = await aclient.get(f"/users/{self.user_id}/matches")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert response.json()[0]["name"] == "Match"
 
-        response = client.get(f"/users/{self.user_id}/matches")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), [])
+    async def test_get_matches_user_not_single(self, aclient, mock_es, user_doc):
+        user_doc["status"] = "married"
+        mock_es.get.return_value = {"_source": user_doc}
 
-    def test_get_matches_no_matches(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.get.return_value = {"_source": self.user_doc}
+        response = await aclient.get(f"/users/{self.user_id}/matches")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    async def test_get_matches_no_matches(self, aclient, mock_es, user_doc):
+        mock_es.get.return_value = {"_source": user_doc}
         mock_es.search.return_value = {"hits": {"hits": []}}
 
-        response = client.get(f"/users/{self.user_id}/matches")
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.json(), [])
+        response = await aclient.get(f"/users/{self.user_id}/matches")
+        assert response.status_code == 200
+        assert response.json() == []
 
-    def test_get_matches_user_not_found(self, mock_es):
-        mock_es.exists.return_value = False
+    async def test_get_matches_no_following(self, aclient, mock_es, user_doc):
+        user_doc["following"] = []
+        mock_es.get.return_value = {"_source": user_doc}
 
-        response = client.get(f"/users/{self.user_id}/matches")
-        self.assertEqual(response.status_code, 404)
-        self.assertIn("User not found", response.json()["detail"])
+        response = await aclient.get(f"/users/{self.user_id}/matches")
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_es.search.assert_not_called()
 
-    def test_get_matches_error(self, mock_es):
-        mock_es.exists.return_value = True
-        mock_es.get.side_effect = Exception("Error")
+    async def test_get_matches_user_not_found(self, aclient, mock_es):
+        mock_es.get.side_effect = NotFoundError(404, "not_found", {})
+
+        response = await aclient.get(f"/users/{self.user_id}/matches")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
 
-        response = client.get(f"/users/{self.user_id}/matches")
-        self.assertEqual(response.status_code, 500)
-        self.assertIn("Failed to retrieve matches", response.json()["detail"])
+    async def test_get_matches_error(self, aclient, mock_es):
+        mock_es.get.side_effect = Exception("Error")
 
-if __name__ == '__main__':
-    unittest.main()
+        response = await aclient.get(f"/users/{self.user_id}/matches")
+        assert response.status_code == 500
+        assert "Failed to retrieve matches" in response.json()["detail"]
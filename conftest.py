@@ -0,0 +1,39 @@
+import asyncio
+import os
+
+# Tight ES client timeouts for the tests. main.create_es() reads them whenever a client is built; startup
+# never runs under ASGITransport, so get_es builds one on first use when a test isn't mocked, and that
+# request then fails in about a second instead of waiting on the default timeout and retries
+os.environ.setdefault("ES_REQUEST_TIMEOUT", "1")
+os.environ.setdefault("ES_MAX_RETRIES", "0")
+
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock
+from main import app, get_es
+
+# One event loop for the whole session so the shared async client is never rebound
+@pytest.fixture(scope="session")
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+# Built once for the whole test session; requests go straight to the ASGI app, no server or per-call loop
+@pytest_asyncio.fixture(scope="session")
+async def aclient():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    # Close the client get_es built lazily, if any test reached it
+    es = getattr(app.state, "es", None)
+    if es is not None:
+        await es.close()
+
+# Fresh async ES mock for every test, installed as an override of the get_es dependency handlers use
+@pytest.fixture
+def mock_es():
+    mock = AsyncMock()
+    app.dependency_overrides[get_es] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_es, None)
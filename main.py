@@ -1,40 +1,86 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from enum import Enum
-from elasticsearch import Elasticsearch
-from elasticsearch.exceptions import NotFoundError
-from typing import List, Optional
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.exceptions import NotFoundError, ConflictError
+from elasticsearch.serializer import JSONSerializer
+import orjson
+import os
 
-app = FastAPI()
-
-# Initialize Elasticsearch client (assumes running locally on default port)
-es = Elasticsearch(hosts=["http://localhost:9200"])
+# Responses are plain dicts serialized by orjson; no Pydantic response models on the request path
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Define the index name
 INDEX_NAME = "users"
 
-# Create the index if it doesn't exist with mappings for better type control
-if not es.indices.exists(index=INDEX_NAME):
-    es.indices.create(
-        index=INDEX_NAME,
-        body={
-            "mappings": {
-                "properties": {
-                    "gender": {"type": "keyword"},
-                    "status": {"type": "keyword"},
-                    "following": {"type": "integer"},
-                    "location": {
-                        "type": "object",
-                        "properties": {
-                            "x": {"type": "float"},
-                            "y": {"type": "float"}
+# Serialize ES request/response bodies with orjson instead of the stdlib json module
+class ORJSONSerializer(JSONSerializer):
+    def dumps(self, data):
+        # Pre-serialized bodies are passed through unchanged
+        if isinstance(data, str):
+            return data
+        return orjson.dumps(data, default=self.default).decode()
+
+    def loads(self, s):
+        return orjson.loads(s)
+
+# Create the index if it doesn't exist with mappings for better type control.
+# Runs on startup rather than at import so importing the app (e.g. in tests) never touches ES.
+async def init_index(es: AsyncElasticsearch):
+    if not await es.indices.exists(index=INDEX_NAME):
+        await es.indices.create(
+            index=INDEX_NAME,
+            body={
+                "mappings": {
+                    "properties": {
+                        "gender": {"type": "keyword"},
+                        "status": {"type": "keyword"},
+                        "following": {"type": "integer"},
+                        "location": {
+                            "type": "object",
+                            "properties": {
+                                "x": {"type": "float"},
+                                "y": {"type": "float"}
+                            }
                         }
                     }
                 }
             }
-        }
+        )
+
+# One async client (assumes ES running locally on default port) shared by every request through its connection pool
+def create_es() -> AsyncElasticsearch:
+    return AsyncElasticsearch(
+        hosts=["http://localhost:9200"],
+        maxsize=64,  # concurrent connections kept open to the node; aiohttp keeps them alive between requests
+        http_compress=True,
+        # Overridable per environment; the test config sets tight values so error paths fail fast
+        timeout=float(os.getenv("ES_REQUEST_TIMEOUT", "2")),
+        retry_on_timeout=True,
+        max_retries=int(os.getenv("ES_MAX_RETRIES", "2")),
+        sniff_on_start=False,
+        serializer=ORJSONSerializer()
     )
 
+@app.on_event("startup")
+async def on_startup():
+    app.state.es = create_es()
+    await init_index(app.state.es)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    es = getattr(app.state, "es", None)
+    if es is not None:
+        await es.close()
+
+# Dependency returning the shared client. If startup never ran (e.g. an ASGI transport in tests) the
+# client is built on first use, so the same timeout/retry settings apply. Tests swap it via app.dependency_overrides
+def get_es(request: Request) -> AsyncElasticsearch:
+    es = getattr(request.app.state, "es", None)
+    if es is None:
+        es = request.app.state.es = create_es()
+    return es
+
 # Enum for gender
 class Gender(Enum):
     male = "male"
@@ -45,82 +91,111 @@ class Status(Enum):
     married = "married"
     single = "single"
 
-# Model for location
-class Location(BaseModel):
-    x: float
-    y: float
-
-# Base model for user data
-class User(BaseModel):
-    gender: Gender
-    status: Status
-    following: List[int]
-    location: Location
-
-# Model for user input (with ID)
-class UserIn(User):
-    id: int
-
-# Model for user output (with ID)
-class UserOut(User):
-    id: int
-
-# Model for partial updates (PATCH)
-class UserUpdate(BaseModel):
-    gender: Optional[Gender] = None
-    status: Optional[Status] = None
-    following: Optional[List[int]] = None
-    location: Optional[Location] = None
-
-# Model for suggestions output
-class UserSuggestion(BaseModel):
-    id: int
-    gender: Gender
-    status: Status
-    location: Location
+# Allowed enum values, built once so validation is a set membership test
+_VALID_GENDERS = frozenset(g.value for g in Gender)
+_VALID_STATUSES = frozenset(s.value for s in Status)
+
+# Fields stored in the user document; request bodies are validated by hand instead of through Pydantic models
+USER_FIELDS = ["gender", "status", "following", "location"]
+
+# Read and decode the JSON request body with orjson
+async def read_json_body(request: Request) -> dict:
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return body
+
+# Strict JSON number checks: bool is an int subclass and int()/float() would coerce strings,
+# truncate 1.9 or iterate a string, so anything but a real number is rejected up front
+def as_int(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(value)
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+def as_float(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(value)
+    return float(value)
+
+# Validate and normalize user fields; partial=True (PATCH) skips missing or null fields
+def parse_user_fields(body: dict, partial: bool = False) -> dict:
+    doc = {}
+    for field in USER_FIELDS:
+        value = body.get(field)
+        if value is None:
+            if partial:
+                continue
+            raise HTTPException(status_code=422, detail=f"Field '{field}' is required")
+        try:
+            if field == "gender":
+                if value not in _VALID_GENDERS:
+                    raise ValueError(value)
+                doc[field] = value
+            elif field == "status":
+                if value not in _VALID_STATUSES:
+                    raise ValueError(value)
+                doc[field] = value
+            elif field == "following":
+                if not isinstance(value, list):
+                    raise TypeError(value)
+                doc[field] = [as_int(fid) for fid in value]
+            else:
+                if not isinstance(value, dict):
+                    raise TypeError(value)
+                doc[field] = {"x": as_float(value["x"]), "y": as_float(value["y"])}
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=422, detail=f"Invalid value for field '{field}'")
+    return doc
 
 # POST: Create a new user
-@app.post("/users/", response_model=UserOut)
-def create_user(user: UserIn):
-    if es.exists(index=INDEX_NAME, id=str(user.id)):
+@app.post("/users/")
+async def create_user(request: Request, es: AsyncElasticsearch = Depends(get_es)):
+    body = await read_json_body(request)
+    if "id" not in body:
+        raise HTTPException(status_code=400, detail="User ID is required")
+    try:
+        user_id = as_int(body["id"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Invalid value for field 'id'")
+    doc = parse_user_fields(body)
+    try:
+        # op_type="create" rejects an existing id with a conflict, so no exists() round trip is needed
+        res = await es.index(index=INDEX_NAME, id=str(user_id), body=doc, op_type="create")
+    except ConflictError:
         raise HTTPException(status_code=400, detail="User with this ID already exists")
-    
-    body = user.dict(exclude={"id"})
-    res = es.index(index=INDEX_NAME, id=str(user.id), body=body)
     if res["result"] != "created":
         raise HTTPException(status_code=500, detail="Failed to create user")
-    return UserOut(id=user.id, **body)
+    return {"id": user_id, **doc}
 
 # GET: Retrieve a user by ID
-@app.get("/users/{user_id}", response_model=UserOut)
-def get_user(user_id: int):
+@app.get("/users/{user_id}")
+async def get_user(user_id: int, es: AsyncElasticsearch = Depends(get_es)):
     try:
-        res = es.get(index=INDEX_NAME, id=str(user_id))
-        return UserOut(id=user_id, **res["_source"])
+        res = await es.get(index=INDEX_NAME, id=str(user_id), _source=USER_FIELDS)
+        return {"id": user_id, **res["_source"]}
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # PATCH: Update a user's fields
-@app.patch("/users/{user_id}", response_model=UserOut)
-def update_user(user_id: int, user_update: UserUpdate):
+@app.patch("/users/{user_id}")
+async def update_user(user_id: int, request: Request, es: AsyncElasticsearch = Depends(get_es)):
+    update_body = {"doc": parse_user_fields(await read_json_body(request), partial=True)}
+    if not update_body["doc"]:
+        raise HTTPException(status_code=400, detail="No fields provided for update")
     try:
-        if not es.exists(index=INDEX_NAME, id=str(user_id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        update_body = {
-            "doc": {k: v for k, v in user_update.dict().items() if v is not None}
-        }
-        if not update_body["doc"]:
-            raise HTTPException(status_code=400, detail="No fields provided for update")
-        
-        res = es.update(index=INDEX_NAME, id=str(user_id), body=update_body)
+        # A missing user raises NotFoundError; _source returns the updated document's user fields in the same response
+        res = await es.update(index=INDEX_NAME, id=str(user_id), body=update_body, _source=USER_FIELDS)
         if res["result"] != "updated":
             raise HTTPException(status_code=500, detail="Failed to update user")
         
-        updated_doc = es.get(index=INDEX_NAME, id=str(user_id))
-        return UserOut(id=user_id, **updated_doc["_source"])
+        return {"id": user_id, **res["get"]["_source"]}
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -128,57 +203,57 @@ def update_user(user_id: int, user_update: UserUpdate):
 
 # DELETE: Delete a user by ID
 @app.delete("/users/{user_id}", status_code=204)
-def delete_user(user_id: int):
+async def delete_user(user_id: int, es: AsyncElasticsearch = Depends(get_es)):
     try:
-        if not es.exists(index=INDEX_NAME, id=str(user_id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        res = es.delete(index=INDEX_NAME, id=str(user_id))
+        # A missing user raises NotFoundError, so no exists() round trip is needed
+        res = await es.delete(index=INDEX_NAME, id=str(user_id))
         if res["result"] != "deleted":
             raise HTTPException(status_code=500, detail="Failed to delete user")
-        return None
+        return Response(status_code=204)
     except NotFoundError:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # GET: Suggest users based on "friends of friends"
-@app.get("/users/{user_id}/suggestions", response_model=List[UserSuggestion])
-def get_user_suggestions(user_id: int):
+@app.get("/users/{user_id}/suggestions")
+async def get_user_suggestions(user_id: int, es: AsyncElasticsearch = Depends(get_es)):
     try:
-        # Step 1: Get the target user's following list
-        if not es.exists(index=INDEX_NAME, id=str(user_id)):
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_doc = es.get(index=INDEX_NAME, id=str(user_id))["_source"]
+        # Step 1: Get the target user's following list (a missing user raises NotFoundError)
+        user_doc = (await es.get(index=INDEX_NAME, id=str(user_id), _source=["following"]))["_source"]
         following = user_doc.get("following", [])
         
-        # Step 2: Collect users followed by the users in the following list
-        suggested_ids = set()
-        for followed_id in following:
-            if es.exists(index=INDEX_NAME, id=str(followed_id)):
-                followed_doc = es.get(index=INDEX_NAME, id=str(followed_id))["_source"]
-                followed_following = followed_doc.get("following", [])
-                suggested_ids.update(followed_following)
+        if not following:
+            return []
         
-        # Step 3: Exclude users already followed and the target user
-        suggested_ids.discard(user_id)
-        for fid in following:
-            suggested_ids.discard(fid)
+        # Step 2: One terms aggregation over the followed users' own following lists yields the
+        # friends-of-friends, ranked by how many followed users follow them. The target user and
+        # users already followed are excluded on the ES side.
+        res = await es.search(
+            index=INDEX_NAME,
+            body={
+                "size": 0,
+                "query": {"ids": {"values": list(map(str, following))}},
+                "aggs": {
+                    "fof": {
+                        "terms": {"field": "following", "size": 50, "exclude": [user_id, *following]}
+                    }
+                }
+            }
+        )
+        suggested_ids = [bucket["key"] for bucket in res["aggregations"]["fof"]["buckets"]]
         
-        # Step 4: Retrieve details for suggested users
+        # Step 3: Retrieve details for suggested users (one mget; docs come back in bucket order)
         suggestions = []
-        for sid in suggested_ids:
-            if es.exists(index=INDEX_NAME, id=str(sid)):
-                doc = es.get(index=INDEX_NAME, id=str(sid))["_source"]
-                suggestions.append(
-                    UserSuggestion(
-                        id=sid,
-                        gender=doc["gender"],
-                        status=doc["status"],
-                        location=doc["location"]
-                    )
-                )
+        if suggested_ids:
+            res = await es.mget(
+                index=INDEX_NAME,
+                body={"ids": list(map(str, suggested_ids))},
+                _source=["gender", "status", "location"]
+            )
+            for doc in res["docs"]:
+                if doc["found"]:
+                    suggestions.append({"id": int(doc["_id"]), **doc["_source"]})
         
         return suggestions
     except NotFoundError:
@@ -0,0 +1,230 @@
+import time
+import pytest
+from elasticsearch.exceptions import NotFoundError, ConflictError
+from main import create_es
+
+# aclient and mock_es come from conftest.py; every test runs on the session event loop
+pytestmark = pytest.mark.asyncio
+
+class TestCreateUser:
+    USER_DATA = {
+        "id": 1,
+        "gender": "male",
+        "status": "single",
+        "following": [2, 3],
+        "location": {"x": 1.5, "y": -2.0}
+    }
+
+    @pytest.fixture
+    def user_data(self):
+        return dict(self.USER_DATA)
+
+    async def test_create_user_success(self, aclient, mock_es, user_data):
+        mock_es.index.return_value = {"result": "created"}
+
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 200
+        assert response.json() == user_data
+        assert mock_es.index.call_args.kwargs["op_type"] == "create"
+        assert mock_es.index.call_args.kwargs["id"] == "1"
+        mock_es.exists.assert_not_called()
+
+    async def test_create_user_already_exists(self, aclient, mock_es, user_data):
+        mock_es.index.side_effect = ConflictError(409, "version_conflict_engine_exception", {})
+
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 400
+        assert "User with this ID already exists" in response.json()["detail"]
+
+    async def test_create_user_missing_id(self, aclient, mock_es, user_data):
+        del user_data["id"]
+
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 400
+        assert "User ID is required" in response.json()["detail"]
+        mock_es.index.assert_not_called()
+
+    async def test_create_user_invalid_json(self, aclient, mock_es):
+        response = await aclient.post("/users/", content=b"{not json")
+        assert response.status_code == 400
+        assert "Invalid JSON body" in response.json()["detail"]
+
+    async def test_create_user_body_not_object(self, aclient, mock_es):
+        response = await aclient.post("/users/", json=[self.USER_DATA])
+        assert response.status_code == 400
+
+    async def test_create_user_missing_field(self, aclient, mock_es, user_data):
+        del user_data["location"]
+
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 422
+        assert "location" in response.json()["detail"]
+        mock_es.index.assert_not_called()
+
+    @pytest.mark.parametrize("field, value", [
+        ("id", True),
+        ("id", 1.9),
+        ("id", "1"),
+        ("gender", "other"),
+        ("gender", ["male"]),
+        ("status", "divorced"),
+        ("following", "12"),
+        ("following", {"2": 3}),
+        ("following", [True]),
+        ("following", [2.5]),
+        ("location", [1.5, -2.0]),
+        ("location", {"x": 1.5}),
+        ("location", {"x": False, "y": -2.0}),
+        ("location", {"x": "1.5", "y": -2.0}),
+    ])
+    async def test_create_user_invalid_value(self, aclient, mock_es, user_data, field, value):
+        user_data[field] = value
+
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 422
+        assert field in response.json()["detail"]
+        mock_es.index.assert_not_called()
+
+    async def test_create_user_integral_float_id(self, aclient, mock_es, user_data):
+        user_data["id"] = 1.0
+        mock_es.index.return_value = {"result": "created"}
+
+        response = await aclient.post("/users/", json=user_data)
+        assert response.status_code == 200
+        assert response.json()["id"] == 1
+
+class TestGetUser:
+    user_id = 1
+    USER_DOC = {"gender": "female", "status": "single", "following": [], "location": {"x": 0.0, "y": 0.0}}
+
+    async def test_get_user_success(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": self.USER_DOC}
+
+        response = await aclient.get(f"/users/{self.user_id}")
+        assert response.status_code == 200
+        assert response.json() == {"id": self.user_id, **self.USER_DOC}
+
+    async def test_get_user_not_found(self, aclient, mock_es):
+        mock_es.get.side_effect = NotFoundError(404, "not_found", {})
+
+        response = await aclient.get(f"/users/{self.user_id}")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+
+class TestUpdateUser:
+    user_id = 1
+
+    async def test_update_user_success(self, aclient, mock_es):
+        source = {"gender": "male", "status": "married", "following": [], "location": {"x": 0.0, "y": 0.0}}
+        mock_es.update.return_value = {"result": "updated", "get": {"_source": source}}
+
+        response = await aclient.patch(f"/users/{self.user_id}", json={"status": "married"})
+        assert response.status_code == 200
+        assert response.json() == {"id": self.user_id, **source}
+        assert mock_es.update.call_args.kwargs["body"] == {"doc": {"status": "married"}}
+        mock_es.get.assert_not_called()
+
+    async def test_update_user_no_fields(self, aclient, mock_es):
+        response = await aclient.patch(f"/users/{self.user_id}", json={})
+        assert response.status_code == 400
+        assert "No fields provided for update" in response.json()["detail"]
+        mock_es.update.assert_not_called()
+
+    async def test_update_user_invalid_value(self, aclient, mock_es):
+        response = await aclient.patch(f"/users/{self.user_id}", json={"following": "12"})
+        assert response.status_code == 422
+        mock_es.update.assert_not_called()
+
+    async def test_update_user_not_found(self, aclient, mock_es):
+        mock_es.update.side_effect = NotFoundError(404, "not_found", {})
+
+        response = await aclient.patch(f"/users/{self.user_id}", json={"status": "married"})
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+
+class TestDeleteUser:
+    user_id = 1
+
+    async def test_delete_user_success(self, aclient, mock_es):
+        mock_es.delete.return_value = {"result": "deleted"}
+
+        response = await aclient.delete(f"/users/{self.user_id}")
+        assert response.status_code == 204
+        assert response.content == b""
+        mock_es.exists.assert_not_called()
+
+    async def test_delete_user_not_found(self, aclient, mock_es):
+        mock_es.delete.side_effect = NotFoundError(404, "not_found", {})
+
+        response = await aclient.delete(f"/users/{self.user_id}")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+
+class TestSuggestions:
+    user_id = 1
+    SUGGESTED_DOC = {"gender": "female", "status": "single", "location": {"x": 1.0, "y": 1.0}}
+
+    async def test_get_suggestions_success(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": {"following": [2, 3]}}
+        mock_es.search.return_value = {
+            "aggregations": {"fof": {"buckets": [{"key": 5, "doc_count": 2}, {"key": 4, "doc_count": 1}]}}
+        }
+        mock_es.mget.return_value = {
+            "docs": [
+                {"_id": "5", "found": True, "_source": self.SUGGESTED_DOC},
+                {"_id": "4", "found": False}
+            ]
+        }
+
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 200
+        assert response.json() == [{"id": 5, **self.SUGGESTED_DOC}]
+
+        body = mock_es.search.call_args.kwargs["body"]
+        assert body["size"] == 0
+        assert body["query"] == {"ids": {"values": ["2", "3"]}}
+        assert body["aggs"]["fof"]["terms"]["exclude"] == [self.user_id, 2, 3]
+        # Candidates are fetched in bucket (rank) order
+        assert mock_es.mget.call_args.kwargs["body"] == {"ids": ["5", "4"]}
+
+    async def test_get_suggestions_no_candidates(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": {"following": [2]}}
+        mock_es.search.return_value = {"aggregations": {"fof": {"buckets": []}}}
+
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_es.mget.assert_not_called()
+
+    async def test_get_suggestions_no_following(self, aclient, mock_es):
+        mock_es.get.return_value = {"_source": {"following": []}}
+
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_es.search.assert_not_called()
+
+    async def test_get_suggestions_user_not_found(self, aclient, mock_es):
+        mock_es.get.side_effect = NotFoundError(404, "not_found", {})
+
+        response = await aclient.get(f"/users/{self.user_id}/suggestions")
+        assert response.status_code == 404
+        assert "User not found" in response.json()["detail"]
+        mock_es.exists.assert_not_called()
+
+class TestClientConfig:
+    # conftest.py sets ES_REQUEST_TIMEOUT=1 and ES_MAX_RETRIES=0 for the whole session
+    async def test_client_uses_test_timeouts(self):
+        es = create_es()
+        try:
+            assert es.transport.max_retries == 0
+            assert es.transport.get_connection().timeout == 1.0
+        finally:
+            await es.close()
+
+    async def test_unmocked_request_fails_fast(self, aclient):
+        # No mock_es: get_es builds a real client with the tight settings, so even without a reachable
+        # ES (the usual test setup) the request returns within about the 1s timeout with no retries
+        start = time.perf_counter()
+        await aclient.get("/users/1")
+        assert time.perf_counter() - start < 5